@@ -0,0 +1,645 @@
+#!/usr/bin/env python3
+"""
+Focus session tracker for the ef-coach skill.
+
+Logs deep-work sessions to a local SQLite database and scans the next few
+hours of the gog calendar for gaps big enough to hold a focus block.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import queue
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from bisect import bisect_right
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from operator import itemgetter
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+
+def eprint(msg: str) -> None:
+    print(msg, file=sys.stderr)
+
+
+# Calendar fetches shell out to gog (fork + exec + OAuth roundtrip); two CLI
+# commands in a row shouldn't pay that twice. Warm results are kept per
+# process and on disk for a short TTL.
+_CALENDAR_CACHE_TTL = 60.0  # seconds
+_CALENDAR_CACHE_PATH = Path.home() / ".cache" / "ef-coach" / "calendar.json"
+_calendar_cache: Dict[int, tuple] = {}
+
+# Resolved once at import so re-instantiating FocusSession from the CLI does
+# not redo the path construction per instance.
+_DEFAULT_DB = str(Path.home() / ".ef-coach" / "focus.db")
+
+try:
+    # Optional: stream-parse large calendars instead of buffering the whole
+    # gog stdout as one string before decoding.
+    import ijson as _ijson
+except ImportError:
+    _ijson = None
+
+try:
+    # Optional: vectorized gap arithmetic for busy calendars.
+    import numpy as _np
+except ImportError:
+    _np = None
+
+# Below this many events the plain Python pass beats NumPy's array setup cost.
+# Deliberately no numba/JIT tier above this: the scan path is dominated by the
+# gog subprocess and works on datetime objects, so JIT compile time would dwarf
+# any win. If a heavier numeric tier is ever needed, dispatch on event count
+# here rather than decorating the datetime loop.
+_VECTORIZE_MIN_EVENTS = 16
+
+# Default duration for events gog reports without an end time.
+_ONE_HOUR = timedelta(hours=1)
+
+# Timer tiers: gaps of at least _TIER_BOUNDS[i] minutes map to _TIER_LABELS[i];
+# anything below the first bound gets a formatted quick-win suggestion.
+_TIER_BOUNDS = (50, 120, 180, 240)
+_TIER_LABELS = (
+    "45 min (extended pomodoro)",
+    "90 min (focus block)",
+    "90 min (3 pomodoros + long break)",
+    "120 min (deep work block)",
+)
+
+# SQL hoisted to module scope: one str object per statement for the process
+# lifetime, so sqlite3's per-connection statement cache always hits on
+# identical text and no per-call string building remains.
+_SQL_START_SESSION = (
+    "INSERT INTO focus_sessions (task, start_time, planned_minutes, energy_before)"
+    " VALUES (?, ?, ?, ?)"
+)
+_SQL_END_SESSION = (
+    "UPDATE focus_sessions"
+    " SET end_time = ?, actual_minutes = ?, outcome = ?, energy_after = ?"
+    " WHERE id = ?"
+)
+_SQL_ACTIVE_SESSION = (
+    "SELECT id, task, start_time, planned_minutes, energy_before"
+    " FROM focus_sessions WHERE end_time IS NULL"
+    " ORDER BY id DESC LIMIT 1"
+)
+_SQL_SESSION_STATS = (
+    "SELECT COUNT(*),"
+    "       AVG(actual_minutes),"
+    "       SUM(CASE WHEN outcome = 'completed' THEN 1 ELSE 0 END) * 1.0 / COUNT(*),"
+    "       AVG(energy_after - energy_before)"
+    " FROM focus_sessions"
+    " WHERE start_time > CAST(strftime('%s', 'now', ?) AS INTEGER)"
+    "   AND end_time IS NOT NULL"
+)
+
+try:
+    # Optional C fast path for the per-event hot loop.
+    from ciso8601 import parse_datetime as _parse_iso
+except ImportError:
+    if sys.version_info >= (3, 11):
+        # fromisoformat accepts a trailing "Z" natively from 3.11 on.
+        _parse_iso = datetime.fromisoformat
+    else:
+
+        def _parse_iso(value: str) -> datetime:
+            if value.endswith("Z"):
+                value = value[:-1] + "+00:00"
+            return datetime.fromisoformat(value)
+
+
+class _ConnPool:
+    """Multi-reader/single-writer SQLite pool.
+
+    Readers are query-only connections handed out from a small queue (opened
+    lazily, up to `max_readers`); writes share one connection behind a lock so
+    WAL always sees a single writer. Connections are returned, never closed,
+    until the pool itself is closed.
+    """
+
+    def __init__(self, db_path: str, max_readers: int = 3) -> None:
+        self.db_path = db_path
+        self._max_readers = max_readers
+        self._readers: "queue.Queue[sqlite3.Connection]" = queue.Queue(maxsize=max_readers)
+        self._reader_count = 0
+        self._reader_count_lock = threading.Lock()
+        self._write_conn = self._open(query_only=False)
+        self._write_lock = threading.Lock()
+
+    def _open(self, query_only: bool) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            isolation_level=None,
+            cached_statements=256,
+        )
+        # WAL + relaxed sync: commits become a WAL append instead of two
+        # journal fsyncs, and readers never block the writer.
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-64000")
+        if query_only:
+            conn.execute("PRAGMA query_only=1")
+        return conn
+
+    @contextmanager
+    def read(self) -> Iterator[sqlite3.Connection]:
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            with self._reader_count_lock:
+                grow = self._reader_count < self._max_readers
+                if grow:
+                    self._reader_count += 1
+            conn = self._open(query_only=True) if grow else self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+
+    @contextmanager
+    def write(self) -> Iterator[sqlite3.Connection]:
+        with self._write_lock:
+            yield self._write_conn
+
+    def close(self) -> None:
+        self._write_conn.close()
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
+        self._reader_count = 0
+
+
+class FocusSession:
+    """SQLite-backed focus session log plus calendar-gap scanning."""
+
+    def __init__(self, db_path: Optional[str] = None) -> None:
+        self.db_path = db_path or _DEFAULT_DB
+        self._conn_pool: Optional[_ConnPool] = None
+        self._init_db()
+
+    def _pool(self) -> _ConnPool:
+        """Create the pool lazily and keep it for the lifetime of the instance."""
+        if self._conn_pool is None:
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn_pool = _ConnPool(self.db_path)
+        return self._conn_pool
+
+    def close(self) -> None:
+        if self._conn_pool is not None:
+            self._conn_pool.close()
+            self._conn_pool = None
+
+    def __del__(self) -> None:
+        self.close()
+
+    def _init_db(self) -> None:
+        with self._pool().write() as conn:
+            # Timestamps are unix epoch seconds: smaller pages than ISO text
+            # and no parse/format round trips on the end/stats paths.
+            conn.execute(
+                """
+            CREATE TABLE IF NOT EXISTS focus_sessions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                task TEXT NOT NULL,
+                start_time INTEGER NOT NULL,
+                end_time INTEGER,
+                planned_minutes INTEGER NOT NULL,
+                actual_minutes REAL,
+                outcome TEXT,
+                energy_before INTEGER,
+                energy_after INTEGER
+            )
+                """
+            )
+            self._migrate_text_timestamps(conn)
+            # Lets the stats window run as an index range scan instead of a
+            # full table scan.
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_fs_start"
+                " ON focus_sessions(start_time, end_time)"
+            )
+
+    @staticmethod
+    def _migrate_text_timestamps(conn: sqlite3.Connection) -> None:
+        """One-shot upgrade of v1 databases that stored ISO-text timestamps."""
+        row = conn.execute(
+            "SELECT type FROM pragma_table_info('focus_sessions')"
+            " WHERE name = 'start_time'"
+        ).fetchone()
+        if row is None or row[0] != "TEXT":
+            return
+        conn.executescript(
+            """
+            BEGIN;
+            ALTER TABLE focus_sessions RENAME TO focus_sessions_v1;
+            CREATE TABLE focus_sessions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                task TEXT NOT NULL,
+                start_time INTEGER NOT NULL,
+                end_time INTEGER,
+                planned_minutes INTEGER NOT NULL,
+                actual_minutes REAL,
+                outcome TEXT,
+                energy_before INTEGER,
+                energy_after INTEGER
+            );
+            INSERT INTO focus_sessions
+                SELECT id, task,
+                       CAST(strftime('%s', start_time) AS INTEGER),
+                       CAST(strftime('%s', end_time) AS INTEGER),
+                       planned_minutes, actual_minutes, outcome,
+                       energy_before, energy_after
+                FROM focus_sessions_v1;
+            DROP TABLE focus_sessions_v1;
+            COMMIT;
+            """
+        )
+
+    # --- session log -----------------------------------------------------
+
+    def start_focus_session(
+        self, task: str, planned_minutes: int = 25, energy_before: Optional[int] = None
+    ) -> int:
+        """Start a session; returns its row id. Only one session may be active."""
+        if self.get_active_session() is not None:
+            raise RuntimeError("A focus session is already active; end it first.")
+        with self._pool().write() as conn:
+            cursor = conn.execute(
+                _SQL_START_SESSION,
+                (task, int(time.time()), planned_minutes, energy_before),
+            )
+            return int(cursor.lastrowid or 0)
+
+    def start_focus_sessions(self, proposals: List[Dict[str, Any]]) -> List[int]:
+        """Bulk-insert planned sessions in a single transaction.
+
+        One COMMIT (one WAL fsync) regardless of batch size; meant for a
+        future `scan --autostart` path. Returns the new row ids.
+        """
+        if not proposals:
+            return []
+        with self._pool().write() as conn:
+            conn.execute("BEGIN")
+            try:
+                conn.executemany(
+                    _SQL_START_SESSION,
+                    [
+                        (
+                            proposal.get("task", "Focus block"),
+                            int(_parse_iso(proposal["start"]).timestamp()),
+                            proposal.get("duration_minutes", 25),
+                            proposal.get("energy_before"),
+                        )
+                        for proposal in proposals
+                    ],
+                )
+                last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return list(range(last_id - len(proposals) + 1, last_id + 1))
+
+    def end_focus_session(
+        self, outcome: str = "completed", energy_after: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Close the active session; returns it (with actual minutes) or None."""
+        active = self.get_active_session()
+        if active is None:
+            return None
+        end_ts = int(time.time())
+        actual_minutes = (end_ts - active["start_ts"]) / 60
+        with self._pool().write() as conn:
+            conn.execute(
+                _SQL_END_SESSION,
+                (end_ts, actual_minutes, outcome, energy_after, active["id"]),
+            )
+        active.update(
+            end_time=datetime.fromtimestamp(end_ts).isoformat(timespec="seconds"),
+            actual_minutes=actual_minutes,
+            outcome=outcome,
+            energy_after=energy_after,
+        )
+        return active
+
+    def get_active_session(self) -> Optional[Dict[str, Any]]:
+        with self._pool().read() as conn:
+            row = conn.execute(_SQL_ACTIVE_SESSION).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row[0],
+            "task": row[1],
+            "start_ts": row[2],
+            "start_time": datetime.fromtimestamp(row[2]).isoformat(timespec="seconds"),
+            "planned_minutes": row[3],
+            "energy_before": row[4],
+        }
+
+    def get_session_stats(self, days_back: int = 7) -> Dict[str, Any]:
+        """Aggregate stats over finished sessions in the last `days_back` days."""
+        # One aggregate pass over the window instead of four round trips that
+        # each re-scan the same rows.
+        with self._pool().read() as conn:
+            cursor = conn.execute(_SQL_SESSION_STATS, (f"-{int(days_back)} days",))
+            total, avg_minutes, completion_rate, energy_delta = cursor.fetchone()
+        return {
+            "days_back": days_back,
+            "sessions": total,
+            "avg_minutes": round(avg_minutes or 0.0, 1),
+            "completion_rate": round(completion_rate, 2) if total else 0.0,
+            "avg_energy_delta": round(energy_delta or 0.0, 2),
+        }
+
+    # --- calendar scan ---------------------------------------------------
+
+    def get_calendar_events(self, hours_ahead: int = 8) -> List[Dict[str, Any]]:
+        """Fetch events overlapping [now, now + hours_ahead) from gog (cached)."""
+        now = datetime.now().astimezone()
+        horizon = now + timedelta(hours=hours_ahead)
+        raw_events = self._cached_raw_events(hours_ahead, now, horizon)
+
+        events: List[Dict[str, Any]] = []
+        parse_iso = _parse_iso  # local binding: skips a global lookup per event
+        for event in raw_events:
+            start_str = event.get("start")
+            if not isinstance(start_str, str):
+                continue
+            start = parse_iso(start_str)
+            end_str = event.get("end")
+            if isinstance(end_str, str):
+                end = parse_iso(end_str)
+            else:
+                end = start + _ONE_HOUR
+            if end <= now or start >= horizon:
+                continue
+            events.append(
+                {"summary": event.get("summary", "(busy)"), "start": start, "end": end}
+            )
+        # gog emits events chronologically; only pay for a sort when the
+        # monotonicity check fails.
+        if any(
+            events[i]["start"] > events[i + 1]["start"] for i in range(len(events) - 1)
+        ):
+            events.sort(key=itemgetter("start"))
+        return events
+
+    def _cached_raw_events(
+        self, hours_ahead: int, now: datetime, horizon: datetime
+    ) -> List[Dict[str, Any]]:
+        cached = _calendar_cache.get(hours_ahead)
+        if cached is not None and time.monotonic() - cached[0] < _CALENDAR_CACHE_TTL:
+            return cached[1]
+        raw_events = self._read_disk_cache(hours_ahead)
+        if raw_events is None:
+            raw_events = self._fetch_raw_events(now, horizon)
+            self._write_disk_cache(hours_ahead, raw_events)
+        _calendar_cache[hours_ahead] = (time.monotonic(), raw_events)
+        return raw_events
+
+    @staticmethod
+    def _read_disk_cache(hours_ahead: int) -> Optional[List[Dict[str, Any]]]:
+        try:
+            if time.time() - _CALENDAR_CACHE_PATH.stat().st_mtime >= _CALENDAR_CACHE_TTL:
+                return None
+            payload = json.loads(_CALENDAR_CACHE_PATH.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if payload.get("hours_ahead") != hours_ahead:
+            return None
+        events = payload.get("events")
+        return events if isinstance(events, list) else None
+
+    @staticmethod
+    def _write_disk_cache(hours_ahead: int, raw_events: List[Dict[str, Any]]) -> None:
+        try:
+            _CALENDAR_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+            _CALENDAR_CACHE_PATH.write_text(
+                json.dumps({"hours_ahead": hours_ahead, "events": raw_events}),
+                encoding="utf-8",
+            )
+        except OSError:
+            pass  # cache is best-effort
+
+    @staticmethod
+    def _fetch_raw_events(now: datetime, horizon: datetime) -> List[Dict[str, Any]]:
+        cmd = [
+            "gog",
+            "calendar",
+            "events",
+            "primary",
+            "--from",
+            now.isoformat(timespec="seconds"),
+            "--to",
+            horizon.isoformat(timespec="seconds"),
+            "--json",
+        ]
+        if _ijson is not None:
+            # Incremental parse straight off the pipe: event dicts are built
+            # one at a time, never the full stdout string.
+            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            assert proc.stdout is not None and proc.stderr is not None
+            try:
+                try:
+                    # Accept the same shapes as the buffered path below:
+                    # {"events": [...]} or a bare top-level array.
+                    head = proc.stdout.peek(64).lstrip()
+                    prefix = "item" if head[:1] == b"[" else "events.item"
+                    events = list(_ijson.items(proc.stdout, prefix))
+                except _ijson.JSONError:
+                    # e.g. empty stdout when gog fails (expired OAuth):
+                    # fall through to the returncode check so the stderr
+                    # diagnostic is raised, not a parser traceback.
+                    events = None
+                stderr = proc.stderr.read()
+            finally:
+                proc.stdout.close()
+                proc.stderr.close()
+            if proc.wait(timeout=30) != 0:
+                raise RuntimeError(
+                    f"gog calendar events failed: {stderr.decode(errors='replace').strip()}"
+                )
+            if events is None:
+                raise RuntimeError("gog calendar events returned invalid JSON")
+            return events
+        # Bytes end to end: json.loads decodes utf-8 itself, so text=True would
+        # only add a second full pass over the payload.
+        result = subprocess.run(cmd, capture_output=True, timeout=30)
+        if result.returncode != 0:
+            raise RuntimeError(
+                f"gog calendar events failed: {result.stderr.decode(errors='replace').strip()}"
+            )
+        payload = json.loads(result.stdout)
+        return payload.get("events", payload) if isinstance(payload, dict) else payload
+
+    def find_focus_opportunities(
+        self, hours_ahead: int = 8, min_gap_minutes: int = 25
+    ) -> List[Dict[str, Any]]:
+        """Return free gaps of at least `min_gap_minutes` between calendar events."""
+        events = self.get_calendar_events(hours_ahead)
+        now = datetime.now().astimezone()
+        horizon = now + timedelta(hours=hours_ahead)
+
+        opportunities: List[Dict[str, Any]] = []
+
+        def add_gap(start: datetime, end: datetime) -> None:
+            minutes = int((end - start).total_seconds() / 60)
+            if minutes >= min_gap_minutes:
+                opportunities.append(
+                    {"start": start, "end": end, "duration_minutes": minutes}
+                )
+
+        if not events:
+            add_gap(now, horizon)
+            return opportunities
+
+        add_gap(now, events[0]["start"])
+        if _np is not None and len(events) >= _VECTORIZE_MIN_EVENTS:
+            # One vectorized subtraction over all adjacent pairs; dicts are
+            # built only for the gaps that qualify.
+            ends = _np.fromiter(
+                (event["end"].timestamp() for event in events[:-1]),
+                dtype=_np.float64,
+                count=len(events) - 1,
+            )
+            starts = _np.fromiter(
+                (event["start"].timestamp() for event in events[1:]),
+                dtype=_np.float64,
+                count=len(events) - 1,
+            )
+            minutes = ((starts - ends) // 60).astype(int)
+            for i in _np.flatnonzero(minutes >= min_gap_minutes):
+                opportunities.append(
+                    {
+                        "start": events[i]["end"],
+                        "end": events[i + 1]["start"],
+                        "duration_minutes": int(minutes[i]),
+                    }
+                )
+        else:
+            # Explicit single pass over adjacent pairs; no index arithmetic to
+            # accidentally grow into a nested scan later.
+            for prev, nxt in zip(events, events[1:]):
+                add_gap(prev["end"], nxt["start"])
+        add_gap(events[-1]["end"], horizon)
+        return opportunities
+
+    def propose_focus_session(self, opportunity: Dict[str, Any]) -> Dict[str, Any]:
+        """Suggest a timer that fits the gap, leaving transition slack."""
+        minutes = opportunity["duration_minutes"]
+        tier = bisect_right(_TIER_BOUNDS, minutes)
+        if tier:
+            suggested_timer = _TIER_LABELS[tier - 1]
+        else:
+            suggested_timer = f"{max(minutes - 5, 10)} min (quick win)"
+        return {
+            "start": opportunity["start"].isoformat(timespec="minutes"),
+            "end": opportunity["end"].isoformat(timespec="minutes"),
+            "duration_minutes": minutes,
+            "suggested_timer": suggested_timer,
+        }
+
+    def scan_and_propose(
+        self, hours_ahead: int = 8, min_gap_minutes: int = 25
+    ) -> List[Dict[str, Any]]:
+        return [
+            self.propose_focus_session(opportunity)
+            for opportunity in self.find_focus_opportunities(hours_ahead, min_gap_minutes)
+        ]
+
+
+def _cmd_start(focus: FocusSession, args: argparse.Namespace) -> int:
+    if not args.task:
+        eprint("start requires a task description.")
+        return 1
+    session_id = focus.start_focus_session(args.task, args.minutes, args.energy)
+    print(f"Started session #{session_id}: {args.task} ({args.minutes} min)")
+    return 0
+
+
+def _cmd_end(focus: FocusSession, args: argparse.Namespace) -> int:
+    session = focus.end_focus_session(args.outcome, args.energy)
+    if session is None:
+        eprint("No active session.")
+        return 1
+    print(
+        f"Ended session #{session['id']} ({session['outcome']}, "
+        f"{session['actual_minutes']:.0f} min)"
+    )
+    return 0
+
+
+def _cmd_active(focus: FocusSession, args: argparse.Namespace) -> int:
+    session = focus.get_active_session()
+    if session is None:
+        print("No active session.")
+    else:
+        print(
+            f"#{session['id']} {session['task']} — started {session['start_time']}, "
+            f"planned {session['planned_minutes']} min"
+        )
+    return 0
+
+
+def _cmd_stats(focus: FocusSession, args: argparse.Namespace) -> int:
+    print(json.dumps(focus.get_session_stats(args.days), indent=2))
+    return 0
+
+
+def _cmd_scan(focus: FocusSession, args: argparse.Namespace) -> int:
+    proposals = focus.scan_and_propose(args.hours, args.min_gap)
+    if not proposals:
+        print("No focus-sized gaps found.")
+    for proposal in proposals:
+        print(
+            f"{proposal['start']} → {proposal['end']} "
+            f"({proposal['duration_minutes']} min): {proposal['suggested_timer']}"
+        )
+    return 0
+
+
+_HANDLERS = {
+    "start": _cmd_start,
+    "end": _cmd_end,
+    "active": _cmd_active,
+    "stats": _cmd_stats,
+    "scan": _cmd_scan,
+}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Track focus sessions and scan for focus time.")
+    parser.add_argument("command", choices=sorted(_HANDLERS))
+    parser.add_argument("task", nargs="?", help="Task description (for start).")
+    parser.add_argument("--minutes", type=int, default=25, help="Planned session length.")
+    parser.add_argument("--energy", type=int, help="Energy level 1-5 (before/after).")
+    parser.add_argument(
+        "--outcome", choices=["completed", "interrupted", "abandoned"], default="completed"
+    )
+    parser.add_argument("--days", type=int, default=7, help="Stats window in days.")
+    parser.add_argument("--hours", type=int, default=8, help="Scan window in hours.")
+    parser.add_argument("--min-gap", type=int, default=25, help="Minimum gap in minutes.")
+    args = parser.parse_args()
+
+    focus = FocusSession()
+    try:
+        return _HANDLERS[args.command](focus, args)
+    except RuntimeError as exc:
+        eprint(str(exc))
+        return 1
+    finally:
+        focus.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,563 @@
+#!/usr/bin/env python3
+"""
+Habit streak tracker for the ef-coach skill.
+
+Tracks habits, completions and streaks in a local SQLite database and
+generates gentle, shame-free reminders for habits not done yet today.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sqlite3
+import sys
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# datetime and pathlib are imported inside the methods that need them:
+# interpreter startup dominates one-shot CLI calls like `list`, and those
+# paths never touch dates or Path.
+
+
+def eprint(msg: str) -> None:
+    print(msg, file=sys.stderr)
+
+
+def _days_since(last_completed: Optional[str]) -> Optional[int]:
+    """Days from an ISO date to today, or None when never completed."""
+    if last_completed is None:
+        return None
+    from datetime import date
+
+    return date.today().toordinal() - date.fromisoformat(last_completed).toordinal()
+
+
+# SQL hoisted to module scope: one stable str object per statement, so
+# sqlite3's per-connection statement cache always hits on identical text and
+# the hot paths never re-parse.
+_SQL_ADD_HABIT = "INSERT INTO habits (name, goal_frequency) VALUES (?, ?)"
+_SQL_LIST_COLUMNS = (
+    "SELECT id, name, goal_frequency, streak_count, last_completed, active FROM habits"
+)
+_SQL_LIST_ACTIVE = _SQL_LIST_COLUMNS + " WHERE active = 1 ORDER BY name"
+_SQL_LIST_ALL = _SQL_LIST_COLUMNS + " ORDER BY name"
+_SQL_DELETE_HABIT = "DELETE FROM habits WHERE id = ?"
+_SQL_GET_HABIT = (
+    "SELECT goal_frequency, streak_count, last_completed FROM habits"
+    " WHERE id = ? AND active = 1"
+)
+_SQL_INSERT_LOG = "INSERT INTO habit_log (habit_id, notes) VALUES (?, ?)"
+# The continue/reset/first decision lives in SQL: one statement for every
+# frequency, so the statement cache holds a single entry and there is no
+# Python-side dispatch. Non-daily habits keep their streak_count untouched;
+# the guard on last_completed makes "already done today" a no-op detected
+# via the empty RETURNING set.
+_SQL_COMPLETE_BASE = (
+    "UPDATE habits SET"
+    " streak_count = CASE"
+    "   WHEN goal_frequency != 'daily' THEN streak_count"
+    "   WHEN last_completed IS NULL THEN 1"
+    "   WHEN julianday(?) - julianday(last_completed) < 1.5 THEN streak_count + 1"
+    "   ELSE 1 END,"
+    " last_completed = ?"
+    " WHERE id = ? AND active = 1"
+    "   AND (last_completed IS NULL OR last_completed != ?)"
+)
+# executemany can't run RETURNING, so the bulk path uses the base form.
+_SQL_COMPLETE = _SQL_COMPLETE_BASE + " RETURNING streak_count"
+_SQL_BULK_ELIGIBLE = (
+    "SELECT id FROM habits WHERE active = 1"
+    " AND (last_completed IS NULL OR last_completed != ?)"
+)
+_SQL_STATUS = (
+    "SELECT id, name, goal_frequency, streak_count, last_completed FROM habits"
+    " WHERE id = ?"
+)
+# Done-today rows are filtered in SQL, so the rows crossing the sqlite3
+# binding are exactly the reminders to emit. Never-completed habits sort
+# first ('IS NOT NULL' is 0 for NULL), then oldest completion first.
+_SQL_REMINDERS = (
+    "SELECT id, name, streak_count, last_completed FROM habits"
+    " WHERE active = 1 AND goal_frequency = 'daily'"
+    "   AND (last_completed IS NULL OR last_completed != ?)"
+    " ORDER BY last_completed IS NOT NULL, last_completed"
+)
+_SQL_HISTORY = (
+    "SELECT timestamp, notes FROM habit_log"
+    " WHERE habit_id = ? AND timestamp > datetime('now', ?)"
+    " ORDER BY timestamp DESC"
+)
+# date() first: julian days start at noon, so truncating julianday(timestamp)
+# directly would bucket days at noon UTC instead of midnight.
+_SQL_ALL_HISTORIES = (
+    "SELECT habit_id, CAST(julianday(date(timestamp)) AS INTEGER) FROM habit_log"
+    " WHERE timestamp > datetime('now', ?)"
+    " ORDER BY habit_id, timestamp"
+)
+
+
+class StreakTracker:
+    """SQLite-backed habit log with streak counting and reminders."""
+
+    # Reminder copy keyed by days since completion: template i applies up to
+    # _REMINDER_BOUNDS[i] days (picked via bisect), the last one beyond that.
+    # Never-completed habits use _REMINDER_NEW. Editing a tier is a data
+    # change, not a branch change.
+    _REMINDER_BOUNDS = (1, 2, 7)
+    _REMINDER_TEMPLATES = (
+        "'{name}' - keep that {streak}-day streak going! 🔥",
+        "'{name}' - no worries, just pick it back up when ready.",
+        "'{name}' - when you're ready to jump back in.",
+        "'{name}' - waiting for you when inspiration strikes.",
+    )
+    _REMINDER_NEW = "Ready to start '{name}'? First step is the hardest!"
+
+    def __init__(self, db_path: Optional[str] = None) -> None:
+        if db_path is None:
+            from pathlib import Path
+
+            db_path = str(Path.home() / ".ef-coach" / "habits.db")
+        self.db_path = db_path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._init_db()
+
+    def _conn_(self) -> sqlite3.Connection:
+        """Open the connection lazily and keep it alive across method calls."""
+        if self._conn is None:
+            from pathlib import Path
+
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+            # isolation_level=None: autocommit, with explicit BEGIN/COMMIT
+            # where a method needs a multi-statement transaction.
+            self._conn = sqlite3.connect(
+                self.db_path,
+                check_same_thread=False,
+                isolation_level=None,
+                cached_statements=128,
+            )
+            self._apply_pragmas(self._conn)
+        return self._conn
+
+    @staticmethod
+    def _apply_pragmas(conn: sqlite3.Connection) -> None:
+        """Tune the connection once at open.
+
+        WAL + synchronous=NORMAL turns each commit into a WAL append instead
+        of two journal fsyncs; the bigger page cache and mmap keep repeated
+        reads in memory. foreign_keys is required for delete_habit's cascade.
+        """
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-65536")
+        conn.execute("PRAGMA mmap_size=268435456")
+        conn.execute("PRAGMA foreign_keys=ON")
+        # Rows come back name-addressable; dict(row) builds result dicts in
+        # one pass instead of fetchall + a second tuple-to-dict loop.
+        conn.row_factory = sqlite3.Row
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def __del__(self) -> None:
+        self.close()
+
+    def _init_db(self) -> None:
+        conn = self._conn_()
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS habits (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL UNIQUE,
+                goal_frequency TEXT NOT NULL DEFAULT 'daily',
+                streak_count INTEGER NOT NULL DEFAULT 0,
+                last_completed TEXT,
+                active INTEGER NOT NULL DEFAULT 1,
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS habit_log (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                habit_id INTEGER NOT NULL REFERENCES habits(id) ON DELETE CASCADE,
+                timestamp TEXT DEFAULT CURRENT_TIMESTAMP,
+                notes TEXT
+            )
+            """
+        )
+        # History filters on (habit_id, timestamp) and sorts newest-first;
+        # list/reminders filter on active (and frequency) and sort by name.
+        # These turn full scans into index range scans as habit_log grows.
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_habit_log_habit_ts"
+            " ON habit_log(habit_id, timestamp DESC)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_habits_active_name"
+            " ON habits(active, name) WHERE active = 1"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_habits_freq_active"
+            " ON habits(goal_frequency, active)"
+        )
+
+    # --- habits ----------------------------------------------------------
+
+    def add_habit(self, name: str, goal_frequency: str = "daily") -> int:
+        conn = self._conn_()
+        cursor = conn.execute(_SQL_ADD_HABIT, (name, goal_frequency))
+        return int(cursor.lastrowid or 0)
+
+    def list_habits(self, include_inactive: bool = False) -> List[Dict[str, Any]]:
+        cursor = self._conn_().cursor()
+        cursor.execute(_SQL_LIST_ALL if include_inactive else _SQL_LIST_ACTIVE)
+        return [dict(row) for row in cursor]
+
+    def update_habit(
+        self,
+        habit_id: int,
+        name: Optional[str] = None,
+        goal_frequency: Optional[str] = None,
+        active: Optional[bool] = None,
+    ) -> None:
+        sets = []
+        params: List[Any] = []
+        if name is not None:
+            sets.append("name = ?")
+            params.append(name)
+        if goal_frequency is not None:
+            sets.append("goal_frequency = ?")
+            params.append(goal_frequency)
+        if active is not None:
+            sets.append("active = ?")
+            params.append(int(active))
+        if not sets:
+            return
+        conn = self._conn_()
+        conn.execute(
+            f"UPDATE habits SET {', '.join(sets)} WHERE id = ?", (*params, habit_id)
+        )
+
+    def delete_habit(self, habit_id: int) -> None:
+        conn = self._conn_()
+        conn.execute(_SQL_DELETE_HABIT, (habit_id,))
+
+    # --- completions -----------------------------------------------------
+
+    def complete_habit(self, habit_id: int, notes: Optional[str] = None) -> Dict[str, Any]:
+        """Log a completion and update the streak for the habit's frequency."""
+        from datetime import date
+
+        conn = self._conn_()
+        cursor = conn.cursor()
+        today_iso = date.today().isoformat()
+        # BEGIN IMMEDIATE takes the write lock up front, so the streak update
+        # and the log insert commit atomically with one fsync.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = cursor.execute(
+                _SQL_COMPLETE, (today_iso, today_iso, habit_id, today_iso)
+            ).fetchone()
+            if row is None:
+                # No row updated: already done today, inactive, or missing.
+                # One read on this cold path to tell those apart.
+                status = cursor.execute(_SQL_GET_HABIT, (habit_id,)).fetchone()
+                conn.execute("COMMIT")
+                if status is None:
+                    raise ValueError(f"No active habit with id {habit_id}")
+                return {
+                    "habit_id": habit_id,
+                    "streak": status[1],
+                    "already_done": True,
+                }
+            cursor.execute(_SQL_INSERT_LOG, (habit_id, notes))
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        return {"habit_id": habit_id, "streak": row[0], "already_done": False}
+
+    def complete_habits_bulk(
+        self, rows: Iterable[Tuple[int, Optional[str]]]
+    ) -> Dict[str, int]:
+        """Log many (habit_id, notes) completions in one transaction.
+
+        Completing N habits via complete_habit pays one commit (one WAL
+        fsync) each; here the streak updates and log inserts all ride one
+        BEGIN IMMEDIATE / COMMIT pair via executemany. Rows for habits
+        already done today, inactive, or unknown are skipped, and repeats
+        of one habit within the batch count once.
+        """
+        from datetime import date
+
+        pairs = list(rows)
+        conn = self._conn_()
+        cursor = conn.cursor()
+        today_iso = date.today().isoformat()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            eligible = {
+                row[0] for row in cursor.execute(_SQL_BULK_ELIGIBLE, (today_iso,))
+            }
+            todo: List[Tuple[int, Optional[str]]] = []
+            for habit_id, notes in pairs:
+                if habit_id in eligible:
+                    eligible.discard(habit_id)
+                    todo.append((habit_id, notes))
+            cursor.executemany(
+                _SQL_COMPLETE_BASE,
+                ((today_iso, today_iso, habit_id, today_iso) for habit_id, _ in todo),
+            )
+            cursor.executemany(_SQL_INSERT_LOG, todo)
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        return {"completed": len(todo), "skipped": len(pairs) - len(todo)}
+
+    def get_habit_raw(self, habit_id: int) -> Dict[str, Any]:
+        """One habit's stored fields, no derived values or date parsing."""
+        cursor = self._conn_().cursor()
+        cursor.execute(_SQL_STATUS, (habit_id,))
+        row = cursor.fetchone()
+        if row is None:
+            raise ValueError(f"No habit with id {habit_id}")
+        return dict(row)
+
+    def get_habit_status(self, habit_id: int) -> Dict[str, Any]:
+        status = self.get_habit_raw(habit_id)
+        status["days_since_completion"] = _days_since(status["last_completed"])
+        return status
+
+    def get_habit_reminders(self, generate_message: bool = True) -> List[Dict[str, Any]]:
+        """Reminders for active daily habits not completed today.
+
+        Pass generate_message=False to skip the per-row string formatting
+        when only (habit_id, days_since) is needed.
+        """
+        from datetime import date
+
+        # Hoisted loop invariants: one date.today()/isoformat per call, and
+        # ordinal arithmetic instead of a timedelta per row.
+        today = date.today()
+        today_ord = today.toordinal()
+        cursor = self._conn_().cursor()
+        cursor.execute(_SQL_REMINDERS, (today.isoformat(),))
+        reminders = []
+        for row in cursor:
+            habit_id, name, streak, last_completed = row
+            if last_completed is None:
+                days_since = None
+            else:
+                days_since = today_ord - date.fromisoformat(last_completed).toordinal()
+            if not generate_message:
+                message = None
+            elif days_since is None:
+                message = self._REMINDER_NEW.format(name=name)
+            else:
+                message = self._REMINDER_TEMPLATES[
+                    bisect_left(self._REMINDER_BOUNDS, days_since)
+                ].format(name=name, streak=streak)
+            reminders.append(
+                {
+                    "habit_id": habit_id,
+                    "name": name,
+                    "streak": streak,
+                    "days_since": days_since,
+                    "message": message,
+                }
+            )
+        return reminders
+
+    def get_habit_history(self, habit_id: int, days: int = 30) -> List[Dict[str, Any]]:
+        cursor = self._conn_().cursor()
+        cursor.execute(_SQL_HISTORY, (habit_id, f"-{int(days)} days"))
+        return [dict(row) for row in cursor]
+
+    def get_all_histories(self, days: int = 90) -> Dict[int, Dict[str, Any]]:
+        """Completion analytics for every habit from one bulk SELECT.
+
+        Returns {habit_id: {completions, longest_run, current_run}} computed
+        in a single ordered pass over (habit_id, day) pairs, instead of one
+        get_habit_history round trip per habit. The kernel is deliberately
+        plain Python: it is a memory-bound single pass over at most a few
+        thousand rows, so a JIT/array detour would cost more than it saves
+        (same reasoning as the focus_session vectorization notes).
+        """
+        cursor = self._conn_().cursor()
+        cursor.execute(_SQL_ALL_HISTORIES, (f"-{int(days)} days",))
+        stats: Dict[int, Dict[str, Any]] = {}
+        entry: Dict[str, Any] = {}
+        prev_hid: Optional[int] = None
+        prev_day: Optional[int] = None
+        run = 0
+        for hid, day in cursor:
+            if hid != prev_hid:
+                entry = stats[hid] = {
+                    "completions": 0,
+                    "longest_run": 0,
+                    "current_run": 0,
+                }
+                prev_hid = hid
+                prev_day = None
+            entry["completions"] += 1
+            if day == prev_day:
+                continue  # several logs on one day don't extend the run
+            run = run + 1 if prev_day is not None and day - prev_day == 1 else 1
+            if run > entry["longest_run"]:
+                entry["longest_run"] = run
+            entry["current_run"] = run
+            prev_day = day
+        return stats
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Track habits, streaks, and reminders.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_add = sub.add_parser("add", help="Add a habit.")
+    p_add.add_argument("name")
+    p_add.add_argument("--frequency", choices=["daily", "weekly", "monthly"], default="daily")
+
+    p_list = sub.add_parser("list", help="List habits.")
+    p_list.add_argument("--all", action="store_true", help="Include inactive habits.")
+
+    p_complete = sub.add_parser("complete", help="Log a completion.")
+    p_complete.add_argument("habit_id", type=int)
+    p_complete.add_argument("--notes")
+
+    sub.add_parser(
+        "bulk", help="Log many completions from stdin CSV (habit_id[,notes])."
+    )
+
+    p_status = sub.add_parser("status", help="Show one habit.")
+    p_status.add_argument("habit_id", type=int)
+
+    sub.add_parser("reminders", help="Reminders for habits not done today.")
+
+    p_history = sub.add_parser("history", help="Completion history.")
+    p_history.add_argument("habit_id", type=int)
+    p_history.add_argument("--days", type=int, default=30)
+
+    p_stats = sub.add_parser("stats", help="Per-habit completion analytics.")
+    p_stats.add_argument("--days", type=int, default=90)
+
+    p_delete = sub.add_parser("delete", help="Delete a habit and its log.")
+    p_delete.add_argument("habit_id", type=int)
+
+    sub.add_parser("repl", help="Interactive mode: run commands in one warm process.")
+
+    return parser
+
+
+def _dispatch(tracker: StreakTracker, args: argparse.Namespace) -> int:
+    try:
+        if args.command == "add":
+            habit_id = tracker.add_habit(args.name, args.frequency)
+            print(f"Added habit #{habit_id}: {args.name} ({args.frequency})")
+        elif args.command == "list":
+            for habit in tracker.list_habits(include_inactive=args.all):
+                flag = "" if habit["active"] else " (inactive)"
+                print(
+                    f"#{habit['id']} {habit['name']} [{habit['goal_frequency']}] "
+                    f"streak {habit['streak_count']}{flag}"
+                )
+        elif args.command == "complete":
+            result = tracker.complete_habit(args.habit_id, args.notes)
+            if result["already_done"]:
+                print(f"Already logged today (streak {result['streak']}).")
+            else:
+                print(f"Done! Streak: {result['streak']}")
+        elif args.command == "bulk":
+            import csv
+
+            # Generator pipeline: rows stream from stdin into the one
+            # transaction without building an intermediate list here.
+            parsed = (
+                (int(row[0]), row[1] or None if len(row) > 1 else None)
+                for row in csv.reader(sys.stdin)
+                if row
+            )
+            counts = tracker.complete_habits_bulk(parsed)
+            print(f"Completed {counts['completed']}, skipped {counts['skipped']}.")
+        elif args.command == "status":
+            status = tracker.get_habit_raw(args.habit_id)
+            # Derive days-since only here, at display time; 0 means "today"
+            # and must not collapse to 'Never' (only None does).
+            days = _days_since(status["last_completed"])
+            print(
+                f"#{status['id']} {status['name']} [{status['goal_frequency']}] "
+                f"streak {status['streak_count']}, "
+                f"days since: {'Never' if days is None else days}"
+            )
+        elif args.command == "reminders":
+            reminders = tracker.get_habit_reminders()
+            if not reminders:
+                print("All habits done today. 🎉")
+            for reminder in reminders:
+                print(reminder["message"])
+        elif args.command == "history":
+            print(json.dumps(tracker.get_habit_history(args.habit_id, args.days), indent=2))
+        elif args.command == "stats":
+            print(json.dumps(tracker.get_all_histories(args.days), indent=2))
+        elif args.command == "delete":
+            tracker.delete_habit(args.habit_id)
+            print(f"Deleted habit #{args.habit_id}.")
+    except (ValueError, sqlite3.IntegrityError) as exc:
+        eprint(str(exc))
+        return 1
+    return 0
+
+
+def _repl(tracker: StreakTracker, parser: argparse.ArgumentParser) -> int:
+    """Read commands from stdin and run them against one warm tracker.
+
+    Interactive runs of several commands otherwise pay interpreter
+    startup, imports, and a fresh DB open per invocation; here the
+    connection, statement cache, and page cache stay hot across commands.
+    """
+    import shlex
+
+    tracker._conn_()  # open the connection once, up front
+    while True:
+        try:
+            line = input("streak> ")
+        except EOFError:
+            print()
+            return 0
+        tokens = shlex.split(line)
+        if not tokens:
+            continue
+        if tokens[0] in ("exit", "quit"):
+            return 0
+        if tokens[0] == "repl":
+            eprint("Already in repl mode.")
+            continue
+        try:
+            args = parser.parse_args(tokens)
+        except SystemExit:
+            continue  # argparse printed usage; keep the session alive
+        _dispatch(tracker, args)
+
+
+def main() -> int:
+    parser = _build_parser()
+    args = parser.parse_args()
+    tracker = StreakTracker()
+    try:
+        if args.command == "repl":
+            return _repl(tracker, parser)
+        return _dispatch(tracker, args)
+    finally:
+        tracker.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())